@@ -8,41 +8,87 @@ LICENSE file in the root directory of this source tree.
 
 import argparse
 import pickle
-from functools import cache
 from pathlib import Path
 
-import multiprocess as mp
 import numpy as np
-import torch
 from jmp.datasets.pretrain_lmdb import PretrainDatasetConfig, PretrainLmdbDataset
-from torch_scatter import scatter
+from torch.utils.data import DataLoader, Dataset
 from tqdm import tqdm
 
 
-def _compute_mean_std(args: argparse.Namespace):
-    @cache
-    def dataset():
-        return PretrainLmdbDataset(
-            PretrainDatasetConfig(src=args.src, lin_ref=args.linref_path)
-        )
+_LINREF_BLOCK_SIZE = 4096
+
+
+class _ExtractDataset(Dataset):
+    """Applies `extract_fn` to each sample inside the `DataLoader` workers."""
+
+    def __init__(self, src: Path, lin_ref: Path | None, extract_fn):
+        self.config = PretrainDatasetConfig(src=src, lin_ref=lin_ref)
+        self.extract_fn = extract_fn
+        self.num_samples = len(PretrainLmdbDataset(self.config))
+        self.dataset: PretrainLmdbDataset | None = None
+
+    def __len__(self):
+        return self.num_samples
+
+    def __getitem__(self, idx: int):
+        # Opened lazily so that every worker holds its own LMDB handles.
+        if self.dataset is None:
+            self.dataset = PretrainLmdbDataset(self.config)
+        return self.extract_fn(self.dataset[idx])
+
+
+def _chunksize(num_samples: int, num_workers: int):
+    return max(1, num_samples // (max(num_workers, 1) * 64))
+
+
+def _collate_list(batch):
+    return batch
 
-    def extract_data(idx):
-        data = dataset()[idx]
-        y = data.y
-        na = data.natoms
-        return (y, na)
 
-    pool = mp.Pool(args.num_workers)
-    indices = range(len(dataset()))
+def _iter_extracted(args: argparse.Namespace, lin_ref: Path | None, extract_fn):
+    dataset = _ExtractDataset(args.src, lin_ref, extract_fn)
+    # Workers return chunks of per-sample results and keep a deep prefetch queue
+    # so LMDB reads overlap with the reduction in the main process.
+    loader = DataLoader(
+        dataset,
+        batch_size=_chunksize(len(dataset), args.num_workers),
+        num_workers=args.num_workers,
+        collate_fn=_collate_list,
+        prefetch_factor=4 if args.num_workers > 0 else None,
+    )
+    with tqdm(total=len(dataset)) as pbar:
+        for batch in loader:
+            yield from batch
+            pbar.update(len(batch))
+
+
+def _extract_mean_std(data):
+    y = float(data.y)
+    na = int(data.natoms)
+    return (y, na)
 
-    outputs = list(tqdm(pool.imap(extract_data, indices), total=len(indices)))
 
-    energies = [y for y, na in outputs]
-    num_atoms = [na for y, na in outputs]
+def _extract_linref(data):
+    x = np.bincount(np.asarray(data.atomic_numbers, dtype=np.int64), minlength=10)
+    y = float(data.y)
+    return (x, y)
 
-    energy_mean = np.mean(energies)
-    energy_std = np.std(energies)
-    avg_num_atoms = np.mean(num_atoms)
+
+def _compute_mean_std(args: argparse.Namespace):
+    # Welford's online algorithm for the energy mean/variance
+    energy_mean = energy_m2 = 0.0
+    sum_na = 0
+    count = 0
+    for y, na in _iter_extracted(args, args.linref_path, _extract_mean_std):
+        count += 1
+        delta = y - energy_mean
+        energy_mean += delta / count
+        energy_m2 += delta * (y - energy_mean)
+        sum_na += na
+
+    energy_std = np.sqrt(energy_m2 / count)
+    avg_num_atoms = sum_na / count
 
     print(
         f"energy_mean: {energy_mean}, energy_std: {energy_std}, average number of atoms: {avg_num_atoms}"
@@ -60,36 +106,32 @@ def _compute_mean_std(args: argparse.Namespace):
 
 
 def _linref(args: argparse.Namespace):
-    @cache
-    def dataset():
-        return PretrainLmdbDataset(PretrainDatasetConfig(src=args.src))
-
-    def extract_data(idx):
-        data = dataset()[idx]
-        x = (
-            scatter(
-                torch.ones(data.atomic_numbers.shape[0]),
-                data.atomic_numbers.long(),
-                dim_size=10,
-            )
-            .long()
-            .numpy()
-        )
-        y = data.y
-        return (x, y)
-
-    pool = mp.Pool(args.num_workers)
-    indices = range(len(dataset()))
-
-    outputs = list(tqdm(pool.imap(extract_data, indices), total=len(indices)))
-
-    features = [x[0] for x in outputs]
-    targets = [x[1] for x in outputs]
-
-    X = np.vstack(features)
-    y = targets
-
-    coeff = np.linalg.lstsq(X, y, rcond=None)[0]
+    # Accumulate the normal equations (X^T X) c = X^T y directly; the feature
+    # dimension is fixed at 10, so the full design matrix is never needed.
+    # Rows are filled into a preallocated block that is folded into the Gram
+    # matrix with one matmul per block rather than one outer product per row.
+    XtX = np.zeros((10, 10), dtype=np.float64)
+    Xty = np.zeros(10, dtype=np.float64)
+    X_block = np.empty((_LINREF_BLOCK_SIZE, 10), dtype=np.float64)
+    y_block = np.empty(_LINREF_BLOCK_SIZE, dtype=np.float64)
+    n = 0
+    for x, y in _iter_extracted(args, None, _extract_linref):
+        X_block[n] = x
+        y_block[n] = y
+        n += 1
+        if n == _LINREF_BLOCK_SIZE:
+            XtX += X_block.T @ X_block
+            Xty += X_block.T @ y_block
+            n = 0
+    XtX += X_block[:n].T @ X_block[:n]
+    Xty += X_block[:n].T @ y_block[:n]
+
+    # Elements that never occur have all-zero rows/columns; give them a zero
+    # coefficient (as the minimum-norm least-squares solution would).
+    present = np.diag(XtX) > 0
+    coeff = np.zeros(10, dtype=np.float64)
+    L = np.linalg.cholesky(XtX[np.ix_(present, present)])
+    coeff[present] = np.linalg.solve(L.T, np.linalg.solve(L, Xty[present]))
     np.savez_compressed(args.out_path, coeff=coeff)
     print(f"Saved linear reference coefficients to {args.out_path}")
 
@@ -55,6 +55,8 @@ class EquiformerV2Config(TypedConfig):
     load_energy_lin_ref: bool = False
 
     activation_checkpoint: bool = False
+    low_precision_embeddings: bool = False
+    """Inference only: store the frozen `sphere_embedding` table in bfloat16."""
     regress_forces: bool = True
     regress_energy: bool = True
     direct_forces: bool = False
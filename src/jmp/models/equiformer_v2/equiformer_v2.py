@@ -42,7 +42,7 @@ from .so3 import (
     SO3_Embedding,
     SO3_Grid,
     SO3_LinearV2,
-    SO3_Rotation,
+    SO3_RotationBundle,
 )
 from .transformer_block import (
     TransBlockV2,
@@ -59,6 +59,22 @@ if typing.TYPE_CHECKING:
 _AVG_NUM_NODES = 77.81317
 _AVG_DEGREE = 23.395238876342773  # IS2RE: 100k, max_radius = 5, max_neighbors = 100
 
+# Modules whose parameters (except `Linear`/`SO3_LinearV2` weights) skip weight decay
+_NO_WEIGHT_DECAY_MODULES = (
+    torch.nn.Linear,
+    SO3_LinearV2,
+    torch.nn.LayerNorm,
+    EquivariantLayerNormArray,
+    EquivariantLayerNormArraySphericalHarmonics,
+    EquivariantRMSNormArraySphericalHarmonics,
+    EquivariantRMSNormArraySphericalHarmonicsV2,
+    GaussianRadialBasisLayer,
+)
+
+
+def _call_block(block, *args):
+    return block(*args)
+
 
 @deprecated(
     "equiformer_v2_force_head (EquiformerV2ForceHead) class is deprecated in favor of equiformerV2_rank1_head  (EqV2Rank1Head)"
@@ -142,6 +158,9 @@ class EquiformerV2Backbone(nn.Module, GraphModelMixin):
         load_energy_lin_ref (bool): Whether to add nn.Parameters for the per-element energy references.
                                     This additional flag is there to ensure compatibility when strict-loading checkpoints, since the `use_energy_lin_ref` flag can be either True or False even if the model is trained with linear references.
                                     You can't have use_energy_lin_ref = True and load_energy_lin_ref = False, since the model will not have the parameters for the linear references. All other combinations are fine.
+        low_precision_embeddings (bool): Inference only. Whether to store the atomic number `sphere_embedding` table in bfloat16.
+                                    The table is frozen (`requires_grad=False`) and `forward` refuses to run in training mode,
+                                    since optimizer updates are far below the bfloat16 resolution of the weights and would round away.
     """
 
     def __init__(
@@ -190,6 +209,7 @@ class EquiformerV2Backbone(nn.Module, GraphModelMixin):
         use_energy_lin_ref: bool | None = False,
         load_energy_lin_ref: bool | None = False,
         activation_checkpoint: bool | None = False,
+        low_precision_embeddings: bool | None = False,
         **kwargs,
     ):
         if mmax_list is None:
@@ -207,6 +227,7 @@ class EquiformerV2Backbone(nn.Module, GraphModelMixin):
         self.num_targets = num_targets
 
         self.activation_checkpoint = activation_checkpoint
+        self.low_precision_embeddings = low_precision_embeddings
         self.use_pbc = use_pbc
         self.use_pbc_single = use_pbc_single
         self.regress_forces = regress_forces
@@ -279,6 +300,24 @@ class EquiformerV2Backbone(nn.Module, GraphModelMixin):
         self.sphere_embedding = nn.Embedding(
             self.max_num_elements, self.sphere_channels_all
         )
+        if self.low_precision_embeddings:
+            # Inference only: bfloat16 master weights cannot absorb optimizer
+            # updates, so the table is frozen. The distance expansion stays in
+            # full precision since bfloat16 cannot resolve its Gaussian centers.
+            self.sphere_embedding.to(torch.bfloat16)
+            self.sphere_embedding.weight.requires_grad_(False)
+        # Row of the l = 0, m = 0 coefficient for each resolution in `SO3_Embedding`
+        self.register_buffer(
+            "sphere_embedding_l0_index",
+            torch.tensor(
+                [
+                    sum((lmax + 1) ** 2 for lmax in self.lmax_list[:i])
+                    for i in range(self.num_resolutions)
+                ],
+                dtype=torch.long,
+            ),
+            persistent=False,
+        )
 
         # Initialize the function used to measure the distances between atoms
         assert self.distance_function in [
@@ -315,9 +354,7 @@ class EquiformerV2Backbone(nn.Module, GraphModelMixin):
             self.source_embedding, self.target_embedding = None, None
 
         # Initialize the module that compute WignerD matrices and other values for spherical harmonic calculations
-        self.SO3_rotation = nn.ModuleList()
-        for i in range(self.num_resolutions):
-            self.SO3_rotation.append(SO3_Rotation(self.lmax_list[i]))
+        self.SO3_rotation = SO3_RotationBundle(self.lmax_list)
 
         # Initialize conversion between degree l and order m layouts
         self.mappingReduced = CoefficientMappingModule(self.lmax_list, self.mmax_list)
@@ -386,6 +423,14 @@ class EquiformerV2Backbone(nn.Module, GraphModelMixin):
             )
             self.blocks.append(block)
 
+        # Resolve how the blocks are invoked once, rather than per layer per step.
+        # The non-reentrant checkpoint is valid in both training and inference.
+        self._block_call = (
+            partial(torch.utils.checkpoint.checkpoint, use_reentrant=False)
+            if self.activation_checkpoint
+            else _call_block
+        )
+
         # Output blocks for energy and forces
         self.norm = get_normalization_layer(
             self.norm_type,
@@ -405,6 +450,9 @@ class EquiformerV2Backbone(nn.Module, GraphModelMixin):
         self.batch_size = len(data.natoms)
         self.dtype = data.pos.dtype
         self.device = data.pos.device
+        assert not (
+            self.low_precision_embeddings and self.training
+        ), "low_precision_embeddings is inference-only; disable it for training."
         atomic_numbers = data.atomic_numbers.long()
         if atomic_numbers.max().item() >= self.max_num_elements:
             print("Skipping sample with atomic number exceeding the maximum")
@@ -426,7 +474,7 @@ class EquiformerV2Backbone(nn.Module, GraphModelMixin):
             neighbors=data.main_num_neighbors,
             node_offset=0,
             batch_full=data.batch,
-            atomic_numbers_full=data.atomic_numbers.long(),
+            atomic_numbers_full=atomic_numbers,
         )
 
         data_batch = data.batch
@@ -472,8 +520,7 @@ class EquiformerV2Backbone(nn.Module, GraphModelMixin):
         )
 
         # Initialize the WignerD matrices and other values for spherical harmonic calculations
-        for i in range(self.num_resolutions):
-            self.SO3_rotation[i].set_wigner(edge_rot_mat)
+        self.SO3_rotation.set_wigner(edge_rot_mat)
 
         ###############################################################
         # Initialize node embeddings
@@ -488,18 +535,15 @@ class EquiformerV2Backbone(nn.Module, GraphModelMixin):
             self.dtype,
         )
 
-        offset_res = 0
-        offset = 0
         # Initialize the l = 0, m = 0 coefficients for each resolution
-        for i in range(self.num_resolutions):
-            if self.num_resolutions == 1:
-                x.embedding[:, offset_res, :] = self.sphere_embedding(atomic_numbers)
-            else:
-                x.embedding[:, offset_res, :] = self.sphere_embedding(atomic_numbers)[
-                    :, offset : offset + self.sphere_channels
-                ]
-            offset = offset + self.sphere_channels
-            offset_res = offset_res + int((self.lmax_list[i] + 1) ** 2)
+        sphere_embedding = self.sphere_embedding(atomic_numbers)
+        if self.num_resolutions == 1:
+            x.embedding[:, 0, :] = sphere_embedding
+        else:
+            # Indexed assignment needs matching dtypes (`low_precision_embeddings`)
+            x.embedding[:, self.sphere_embedding_l0_index, :] = sphere_embedding.to(
+                self.dtype
+            ).view(-1, self.num_resolutions, self.sphere_channels)
 
         # Edge encoding (distance and atom edge)
         graph.edge_distance = self.distance_expansion(graph.edge_distance)
@@ -524,32 +568,23 @@ class EquiformerV2Backbone(nn.Module, GraphModelMixin):
             len(atomic_numbers),
             graph.node_offset,
         )
-        x.embedding = x.embedding + edge_degree.embedding
+        # In-place is autograd-safe here: `x.embedding` was only written to (by the
+        # l = 0 initialization above) and is not saved for backward by any op.
+        x.embedding.add_(edge_degree.embedding)
 
         ###############################################################
         # Update spherical node embeddings
         ###############################################################
         for i in range(self.num_layers):
-            if self.activation_checkpoint:
-                x = torch.utils.checkpoint.checkpoint(
-                    self.blocks[i],
-                    x,  # SO3_Embedding
-                    graph.atomic_numbers_full,
-                    graph.edge_distance,
-                    graph.edge_index,
-                    data_batch,  # for GraphDropPath
-                    graph.node_offset,
-                    use_reentrant=not self.training,
-                )
-            else:
-                x = self.blocks[i](
-                    x,  # SO3_Embedding
-                    graph.atomic_numbers_full,
-                    graph.edge_distance,
-                    graph.edge_index,
-                    batch=data_batch,  # for GraphDropPath
-                    node_offset=graph.node_offset,
-                )
+            x = self._block_call(
+                self.blocks[i],
+                x,  # SO3_Embedding
+                graph.atomic_numbers_full,
+                graph.edge_distance,
+                graph.edge_index,
+                data_batch,  # for GraphDropPath
+                graph.node_offset,
+            )
 
         # Final layer norm
         x.embedding = self.norm(x.embedding)
@@ -571,18 +606,18 @@ class EquiformerV2Backbone(nn.Module, GraphModelMixin):
         node_partition = gp_utils.scatter_to_model_parallel_region(
             torch.arange(len(atomic_numbers_full)).to(self.device)
         )
-        edge_partition = torch.where(
-            torch.logical_and(
-                edge_index[1] >= node_partition.min(),
-                edge_index[1] <= node_partition.max(),  # TODO: 0 or 1?
-            )
-        )[0]
+        # `node_partition` is a contiguous (ascending) range, so only its bounds are
+        # needed; read both with a single device -> host sync
+        node_min, node_max = node_partition[[0, -1]].tolist()
+        edge_partition = (
+            (edge_index[1] >= node_min) & (edge_index[1] <= node_max)  # TODO: 0 or 1?
+        ).nonzero(as_tuple=True)[0]
         edge_index = edge_index[:, edge_partition]
         edge_distance = edge_distance[edge_partition]
         edge_distance_vec = edge_distance_vec[edge_partition]
         atomic_numbers = atomic_numbers_full[node_partition]
         data_batch = data_batch_full[node_partition]
-        node_offset = node_partition.min().item()
+        node_offset = node_min
         return (
             atomic_numbers,
             data_batch,
@@ -603,29 +638,15 @@ class EquiformerV2Backbone(nn.Module, GraphModelMixin):
     @torch.jit.ignore
     def no_weight_decay(self) -> set:
         no_wd_list = []
-        named_parameters_list = [name for name, _ in self.named_parameters()]
+        named_parameters_set = {name for name, _ in self.named_parameters()}
         for module_name, module in self.named_modules():
-            if isinstance(
-                module,
-                (
-                    torch.nn.Linear,
-                    SO3_LinearV2,
-                    torch.nn.LayerNorm,
-                    EquivariantLayerNormArray,
-                    EquivariantLayerNormArraySphericalHarmonics,
-                    EquivariantRMSNormArraySphericalHarmonics,
-                    EquivariantRMSNormArraySphericalHarmonicsV2,
-                    GaussianRadialBasisLayer,
-                ),
-            ):
+            if isinstance(module, _NO_WEIGHT_DECAY_MODULES):
+                skip_weight = isinstance(module, (torch.nn.Linear, SO3_LinearV2))
                 for parameter_name, _ in module.named_parameters():
-                    if (
-                        isinstance(module, (torch.nn.Linear, SO3_LinearV2))
-                        and "weight" in parameter_name
-                    ):
+                    if skip_weight and "weight" in parameter_name:
                         continue
                     global_parameter_name = module_name + "." + parameter_name
-                    assert global_parameter_name in named_parameters_list
+                    assert global_parameter_name in named_parameters_set
                     no_wd_list.append(global_parameter_name)
 
         return set(no_wd_list)
@@ -221,8 +221,7 @@ class EqV2DeNSBackbone(EquiformerV2Backbone):
         )
 
         # Initialize the WignerD matrices and other values for spherical harmonic calculations
-        for i in range(self.num_resolutions):
-            self.SO3_rotation[i].set_wigner(edge_rot_mat)
+        self.SO3_rotation.set_wigner(edge_rot_mat)
 
         ###############################################################
         # Initialize node embeddings
@@ -348,26 +347,15 @@ class EqV2DeNSBackbone(EquiformerV2Backbone):
         ###############################################################
 
         for i in range(self.num_layers):
-            if self.activation_checkpoint:
-                x = torch.utils.checkpoint.checkpoint(
-                    self.blocks[i],
-                    x,  # SO3_Embedding
-                    graph.atomic_numbers_full,
-                    graph.edge_distance,
-                    graph.edge_index,
-                    data_batch,  # for GraphDropPath
-                    graph.node_offset,
-                    use_reentrant=not self.training,
-                )
-            else:
-                x = self.blocks[i](
-                    x,  # SO3_Embedding
-                    graph.atomic_numbers_full,
-                    graph.edge_distance,
-                    graph.edge_index,
-                    batch=data_batch,  # for GraphDropPath
-                    node_offset=graph.node_offset,
-                )
+            x = self._block_call(
+                self.blocks[i],
+                x,  # SO3_Embedding
+                graph.atomic_numbers_full,
+                graph.edge_distance,
+                graph.edge_index,
+                data_batch,  # for GraphDropPath
+                graph.node_offset,
+            )
 
         # Final layer norm
         x.embedding = self.norm(x.embedding)
@@ -13,6 +13,7 @@ TODO:
 
 from __future__ import annotations
 
+import functools
 import math
 
 import torch
@@ -494,6 +495,106 @@ class SO3_Rotation(torch.nn.Module):
         return wigner.detach()
 
 
+class SO3_RotationBundle(torch.nn.ModuleList):
+    """
+    List of `SO3_Rotation` (one per resolution) whose Wigner-D matrices are computed together
+
+    The Wigner-D matrices are block diagonal in the degree l, so the matrices of a smaller
+    lmax are the top-left block of those of the largest lmax. They are therefore computed
+    once for `max(lmax_list)` and every other resolution aliases a slice of them.
+
+    Args:
+        lmax_list (list:int):   List of maximum degree of the spherical harmonics
+    """
+
+    def __init__(
+        self,
+        lmax_list: list[int],
+    ):
+        super().__init__([SO3_Rotation(lmax) for lmax in lmax_list])
+        self.lmax_list = lmax_list
+        self.max_index = lmax_list.index(max(lmax_list))
+
+    def set_wigner(self, rot_mat3x3):
+        rotation_max = self[self.max_index]
+        rotation_max.set_wigner(rot_mat3x3)
+        for i, rotation in enumerate(self):
+            if i == self.max_index:
+                continue
+            size = (rotation.lmax + 1) ** 2
+            rotation.device, rotation.dtype = rotation_max.device, rotation_max.dtype
+            rotation.wigner = rotation_max.wigner[:, :size, :size]
+            rotation.wigner_inv = rotation_max.wigner_inv[:, :size, :size]
+
+
+@functools.lru_cache(maxsize=None)
+def _so3_grid_mats(
+    lmax: int,
+    mmax: int,
+    lat_resolution: int,
+    long_resolution: int,
+    normalization: str,
+    dtype: torch.dtype,
+) -> tuple[torch.Tensor, torch.Tensor]:
+    """
+    Compute the (CPU) irreps <--> grid transformation matrices used by `SO3_Grid`.
+
+    These only depend on the arguments, so they are computed once per process and
+    reused by every `SO3_Grid` (and hence every model instance) with the same key.
+    `dtype` (the caller's default dtype) is part of the key, so float32 and float64
+    models never share cached grids.
+    """
+    mapping = CoefficientMappingModule([lmax], [lmax])
+
+    device = "cpu"
+
+    to_grid = ToS2Grid(
+        lmax,
+        (lat_resolution, long_resolution),
+        normalization=normalization,  # normalization="integral",
+        dtype=dtype,
+        device=device,
+    )
+    to_grid_mat = torch.einsum("mbi, am -> bai", to_grid.shb, to_grid.sha).detach()
+    # rescale based on mmax
+    if lmax != mmax:
+        for lval in range(lmax + 1):
+            if lval <= mmax:
+                continue
+            start_idx = lval**2
+            length = 2 * lval + 1
+            rescale_factor = math.sqrt(length / (2 * mmax + 1))
+            to_grid_mat[:, :, start_idx : (start_idx + length)] = (
+                to_grid_mat[:, :, start_idx : (start_idx + length)] * rescale_factor
+            )
+    to_grid_mat = to_grid_mat[:, :, mapping.coefficient_idx(lmax, mmax)]
+
+    from_grid = FromS2Grid(
+        (lat_resolution, long_resolution),
+        lmax,
+        normalization=normalization,  # normalization="integral",
+        dtype=dtype,
+        device=device,
+    )
+    from_grid_mat = torch.einsum(
+        "am, mbi -> bai", from_grid.sha, from_grid.shb
+    ).detach()
+    # rescale based on mmax
+    if lmax != mmax:
+        for lval in range(lmax + 1):
+            if lval <= mmax:
+                continue
+            start_idx = lval**2
+            length = 2 * lval + 1
+            rescale_factor = math.sqrt(length / (2 * mmax + 1))
+            from_grid_mat[:, :, start_idx : (start_idx + length)] = (
+                from_grid_mat[:, :, start_idx : (start_idx + length)] * rescale_factor
+            )
+    from_grid_mat = from_grid_mat[:, :, mapping.coefficient_idx(lmax, mmax)]
+
+    return to_grid_mat, from_grid_mat
+
+
 class SO3_Grid(torch.nn.Module):
     """
     Helper functions for grid representation of the irreps
@@ -524,58 +625,20 @@ class SO3_Grid(torch.nn.Module):
 
         self.mapping = CoefficientMappingModule([self.lmax], [self.lmax])
 
-        device = "cpu"
-
-        to_grid = ToS2Grid(
-            self.lmax,
-            (self.lat_resolution, self.long_resolution),
-            normalization=normalization,  # normalization="integral",
-            device=device,
-        )
-        to_grid_mat = torch.einsum("mbi, am -> bai", to_grid.shb, to_grid.sha).detach()
-        # rescale based on mmax
-        if lmax != mmax:
-            for lval in range(lmax + 1):
-                if lval <= mmax:
-                    continue
-                start_idx = lval**2
-                length = 2 * lval + 1
-                rescale_factor = math.sqrt(length / (2 * mmax + 1))
-                to_grid_mat[:, :, start_idx : (start_idx + length)] = (
-                    to_grid_mat[:, :, start_idx : (start_idx + length)] * rescale_factor
-                )
-        to_grid_mat = to_grid_mat[
-            :, :, self.mapping.coefficient_idx(self.lmax, self.mmax)
-        ]
-
-        from_grid = FromS2Grid(
-            (self.lat_resolution, self.long_resolution),
+        to_grid_mat, from_grid_mat = _so3_grid_mats(
             self.lmax,
-            normalization=normalization,  # normalization="integral",
-            device=device,
+            self.mmax,
+            self.lat_resolution,
+            self.long_resolution,
+            normalization,
+            torch.get_default_dtype(),
         )
-        from_grid_mat = torch.einsum(
-            "am, mbi -> bai", from_grid.sha, from_grid.shb
-        ).detach()
-        # rescale based on mmax
-        if lmax != mmax:
-            for lval in range(lmax + 1):
-                if lval <= mmax:
-                    continue
-                start_idx = lval**2
-                length = 2 * lval + 1
-                rescale_factor = math.sqrt(length / (2 * mmax + 1))
-                from_grid_mat[:, :, start_idx : (start_idx + length)] = (
-                    from_grid_mat[:, :, start_idx : (start_idx + length)]
-                    * rescale_factor
-                )
-        from_grid_mat = from_grid_mat[
-            :, :, self.mapping.coefficient_idx(self.lmax, self.mmax)
-        ]
 
         # save tensors and they will be moved to GPU
-        self.register_buffer("to_grid_mat", to_grid_mat)
-        self.register_buffer("from_grid_mat", from_grid_mat)
+        # (cloned so that in-place updates, e.g. `load_state_dict`, never leak
+        # into the shared cache)
+        self.register_buffer("to_grid_mat", to_grid_mat.clone())
+        self.register_buffer("from_grid_mat", from_grid_mat.clone())
 
     # Compute matrices to transform irreps to grid
     def get_to_grid_mat(self, device):